@@ -1,14 +1,27 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import forms, phone_intake, client_intake, threads
+from app.routers import forms, phone_intake, client_intake, threads, search, metrics
 from app import models
-from app.database import engine
+from app.database import engine, SessionLocal
+from app.services.form_storage import setup_document_storage
+from app.services.search_service import setup_search_index
+from app.services.retention_service import start_retention_job
 
 # Add any other sensitive data as environment variables
 
 models.Base.metadata.create_all(bind=engine)
+setup_document_storage(engine)
+setup_search_index(engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    retention_job = start_retention_job(SessionLocal, engine)
+    yield
+    if retention_job:
+        retention_job.cancel()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,4 +35,6 @@ app.add_middleware(
 app.include_router(forms.router, prefix="/forms", tags=["forms"])
 app.include_router(phone_intake.router, prefix="/phone", tags=["phone_intake"])
 app.include_router(client_intake.router, prefix="/client_intake", tags=["client_intake"])
-app.include_router(threads.router, prefix="/threads", tags=["threads"])
\ No newline at end of file
+app.include_router(threads.router, prefix="/threads", tags=["threads"])
+app.include_router(search.router, prefix="/search", tags=["search"])
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
\ No newline at end of file
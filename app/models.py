@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Enum as SQLAlchemyEnum
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, JSON, Enum as SQLAlchemyEnum
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime, timezone
@@ -33,6 +33,17 @@ class PhoneMessage(Base):
     created_at = Column(DateTime(timezone=True), default=utc_now)
     thread = relationship("Thread", back_populates="messages")
 
+class PhoneMessageArchive(Base):
+    __tablename__ = "phone_messages_archive"
+
+    # Rows moved out of phone_messages by the retention job, ids preserved
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    thread_id = Column(Integer, index=True)
+    voice_input = Column(String)
+    assistant_response = Column(String)
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), default=utc_now)
+
 class FormTemplate(Base):
     __tablename__ = "form_templates"
 
@@ -53,7 +64,7 @@ class FormField(Base):
     name = Column(String)
     description = Column(String, nullable=True)
     field_type = Column(SQLAlchemyEnum(FieldType), nullable=False)
-    options = Column(ARRAY(String), nullable=True)  # Changed to ARRAY(String)
+    options = Column(ARRAY(String).with_variant(JSON, "sqlite"), nullable=True)  # JSON list on SQLite for local use
     order = Column(Integer)
     template = relationship("FormTemplate", back_populates="fields")
 
@@ -63,6 +74,8 @@ class FormResponse(Base):
     id = Column(Integer, primary_key=True, index=True)
     template_id = Column(Integer, ForeignKey("form_templates.id"))
     submitted_at = Column(DateTime(timezone=True), default=utc_now)
+    # Document storage mode: {field_id: {"id": value id, "v": typed value}}, used instead of FormFieldValue rows
+    value_document = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
     template = relationship("FormTemplate", back_populates="responses")
     field_values = relationship("FormFieldValue", back_populates="response", cascade="all, delete-orphan")
     thread = relationship("Thread", back_populates="form", uselist=False)  # One-to-one relationship
@@ -73,6 +86,8 @@ class FormResponse(Base):
 
 class FormFieldValue(Base):
     __tablename__ = "form_field_values"
+    # Ids are shared with document-stored values, so SQLite must never reuse one
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     response_id = Column(Integer, ForeignKey("form_responses.id"))
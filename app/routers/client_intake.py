@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from app.services.intake_service import process_message, get_form_data
+from app.services.admission_control import AdmissionRejected
 from typing import List, Dict
 from sqlalchemy.orm import Session
 from app.database import get_db
@@ -15,7 +16,10 @@ class ChatResponse(BaseModel):
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(message: ChatMessage, db: Session = Depends(get_db)):
-    response = await process_message(message.content, db)
+    try:
+        response = await process_message(message.content, db)
+    except AdmissionRejected:
+        raise HTTPException(status_code=503, detail="Assistant is busy, please retry", headers={"Retry-After": "1"})
     return ChatResponse(messages=[{"role": "assistant", "content": response}])
 
 @router.get("/form-data")
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
 from app import models, schemas
 from app.database import get_db
-from sqlalchemy import update
+from sqlalchemy import update, select
+from app.services.form_storage import store_field_values, document_value_to_str
+import orjson
 
 router = APIRouter()
 
@@ -79,43 +81,119 @@ def update_form_template(template_id: int, form_template: schemas.FormTemplateUp
 @router.post("/responses", response_model=schemas.FormResponse)
 def create_form_response(response: schemas.FormResponseCreate, db: Session = Depends(get_db)):
     db_response = models.FormResponse(template_id=response.template_id)
+    field_types = dict(db.execute(
+        select(models.FormField.id, models.FormField.field_type)
+        .where(models.FormField.template_id == response.template_id)
+    ).all())
+    store_field_values(
+        db,
+        db_response,
+        [(field_value.field_id, field_value.value) for field_value in response.field_values],
+        field_types,
+    )
     db.add(db_response)
     db.commit()
-    db.refresh(db_response)
 
-    for field_value in response.field_values:
-        db_field_value = models.FormFieldValue(**field_value.dict(), response_id=db_response.id)
-        db.add(db_field_value)
-    
-    db.commit()
-    db.refresh(db_response)
-    return db_response
+    return Response(content=orjson.dumps(form_response_dicts(db, response_id=db_response.id)[0], option=orjson.OPT_UTC_Z),
+                    media_type="application/json")
+
+def form_response_dicts(db: Session, skip: int = 0, limit: int = 100, response_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    # Fetch only the columns the API returns in flat queries (no joinedload
+    # cartesian product) and build plain dicts, skipping per-object pydantic
+    # validation. Output matches schemas.FormResponse for both storage modes.
+    response_query = (
+        select(
+            models.FormResponse.id,
+            models.FormResponse.template_id,
+            models.FormResponse.submitted_at,
+            models.FormResponse.value_document,
+            models.FormTemplate.name,
+            models.Thread.id,
+        )
+        .outerjoin(models.FormTemplate, models.FormTemplate.id == models.FormResponse.template_id)
+        .outerjoin(models.Thread, models.Thread.form_id == models.FormResponse.id)
+    )
+    if response_id is not None:
+        response_query = response_query.where(models.FormResponse.id == response_id)
+    else:
+        response_query = response_query.order_by(models.FormResponse.id).offset(skip).limit(limit)
+
+    responses: Dict[int, Dict[str, Any]] = {}
+    documents: Dict[int, Dict[str, Any]] = {}
+    for id_, template_id, submitted_at, value_document, template_name, thread_id in db.execute(response_query):
+        responses[id_] = {
+            "template_id": template_id,
+            "id": id_,
+            "submitted_at": submitted_at,
+            "field_values": [],
+            "template_name": template_name,
+            "thread_id": thread_id,
+        }
+        if value_document:
+            documents[id_] = value_document
+
+    if documents:
+        document_field_ids = {int(field_id) for document in documents.values() for field_id in document}
+        fields = {
+            field_id: (order, name) for field_id, order, name in db.execute(
+                select(models.FormField.id, models.FormField.order, models.FormField.name)
+                .where(models.FormField.id.in_(document_field_ids))
+            )
+        }
+        for id_, document in documents.items():
+            field_values = []
+            for key, entry in document.items():
+                order, field_name = fields.get(int(key), (None, None))
+                field_values.append((order or 0, int(key), field_name, entry))
+            # Documents don't keep key order (JSONB), so follow the template's field order
+            for _, field_id, field_name, entry in sorted(field_values, key=lambda item: item[:2]):
+                responses[id_]["field_values"].append({
+                    "field_id": field_id,
+                    "value": document_value_to_str(entry["v"]),
+                    "id": entry["id"],
+                    "response_id": id_,
+                    "field_name": field_name,
+                })
+
+    row_response_ids = [id_ for id_ in responses if id_ not in documents]
+    if row_response_ids:
+        value_rows = db.execute(
+            select(
+                models.FormFieldValue.field_id,
+                models.FormFieldValue.value,
+                models.FormFieldValue.id,
+                models.FormFieldValue.response_id,
+                models.FormField.name,
+            )
+            .outerjoin(models.FormField, models.FormField.id == models.FormFieldValue.field_id)
+            .where(models.FormFieldValue.response_id.in_(row_response_ids))
+            .order_by(models.FormFieldValue.response_id, models.FormFieldValue.id)
+        ).all()
+        for field_id, value, value_id, value_response_id, field_name in value_rows:
+            responses[value_response_id]["field_values"].append({
+                "field_id": field_id,
+                "value": value,
+                "id": value_id,
+                "response_id": value_response_id,
+                "field_name": field_name,
+            })
+
+    return list(responses.values())
+
+def serialize_form_responses(db: Session, skip: int = 0, limit: int = 100) -> bytes:
+    return orjson.dumps(form_response_dicts(db, skip, limit), option=orjson.OPT_UTC_Z)
 
 @router.get("/responses", response_model=List[schemas.FormResponse])
 def get_form_responses(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    responses = db.query(models.FormResponse).options(
-        joinedload(models.FormResponse.field_values).joinedload(models.FormFieldValue.field),
-        joinedload(models.FormResponse.thread)
-    ).offset(skip).limit(limit).all()
-    
-    for response in responses:
-        response.thread_id = response.thread.id if response.thread else None
-    
-    return responses
+    return Response(content=serialize_form_responses(db, skip, limit), media_type="application/json")
 
 @router.get("/responses/{response_id}", response_model=schemas.FormResponse)
 def get_form_response(response_id: int, db: Session = Depends(get_db)):
-    db_response = db.query(models.FormResponse).options(
-        joinedload(models.FormResponse.field_values).joinedload(models.FormFieldValue.field),
-        joinedload(models.FormResponse.thread)
-    ).filter(models.FormResponse.id == response_id).first()
-    
-    if db_response is None:
+    responses = form_response_dicts(db, response_id=response_id)
+    if not responses:
         raise HTTPException(status_code=404, detail="Form response not found")
-    
-    db_response.thread_id = db_response.thread.id if db_response.thread else None
-    
-    return db_response
+
+    return Response(content=orjson.dumps(responses[0], option=orjson.OPT_UTC_Z), media_type="application/json")
 
 @router.delete("/templates/{template_id}", response_model=schemas.FormTemplate)
 def delete_form_template(template_id: int, db: Session = Depends(get_db)):
@@ -133,9 +211,10 @@ def delete_form_response(response_id: int, db: Session = Depends(get_db)):
     if db_response is None:
         raise HTTPException(status_code=404, detail="Form response not found")
     
+    deleted = form_response_dicts(db, response_id=response_id)[0]
     db.delete(db_response)
     db.commit()
-    return db_response
+    return Response(content=orjson.dumps(deleted, option=orjson.OPT_UTC_Z), media_type="application/json")
 
 # @router.put("/templates/{template_id}/set-current", response_model=schemas.FormTemplate)
 # def set_current_form_template(template_id: int, set_current: schemas.SetCurrentTemplate, db: Session = Depends(get_db)):
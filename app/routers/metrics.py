@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.admission_control import llm_admission
+
+router = APIRouter()
+
+@router.get("/", response_class=PlainTextResponse)
+def get_metrics():
+    return llm_admission.render_metrics()
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Request, Response, Query, Depends
+from fastapi import APIRouter, Request, Response, Query, Depends, BackgroundTasks
 from twilio.twiml.voice_response import VoiceResponse, Gather
 from twilio.rest import Client
-from app.services.intake_service import process_message
-from app.database import get_db
+from app.services.intake_service import process_message, warm_up_thread
+from app.services.admission_control import AdmissionRejected
+from app.database import get_db, SessionLocal
 from app.models import Thread, PhoneMessage
 from app.schemas import ThreadCreate, PhoneMessageCreate
 import logging
@@ -21,13 +22,17 @@ account_sid = os.getenv("TWILIO_ACCOUNT_SID")
 auth_token = os.getenv("TWILIO_AUTH_TOKEN")
 twilio_phone_number = os.getenv("TWILIO_PHONE_NUMBER")
 
+# While the model is saturated the caller is put on hold and the turn retried
+PHONE_HOLD_PAUSE_SECONDS = int(os.getenv("PHONE_HOLD_PAUSE_SECONDS", "2"))
+PHONE_MAX_HOLDS = int(os.getenv("PHONE_MAX_HOLDS", "5"))
+
 client = Client(account_sid, auth_token)
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 @router.post("/answer")
-async def answer(request: Request, thread_id: Optional[int] = Query(default=None), db: Session = Depends(get_db)):
+async def answer(request: Request, background_tasks: BackgroundTasks, thread_id: Optional[int] = Query(default=None), db: Session = Depends(get_db)):
     voice_response = VoiceResponse()
     
     if thread_id is None:
@@ -50,6 +55,9 @@ async def answer(request: Request, thread_id: Optional[int] = Query(default=None
         
         # Add the initial greeting
         voice_response.say(greeting)
+
+        # Prepare the agent for the first turn while the greeting plays
+        background_tasks.add_task(warm_up_thread, SessionLocal, thread_id)
     
     gather = Gather(
         input="speech",
@@ -69,23 +77,49 @@ async def answer(request: Request, thread_id: Optional[int] = Query(default=None
 async def handle_input(
     request: Request,
     thread_id: int = Query(...),  # Now required
+    holds: int = Query(default=0),  # Set by hold redirects, which carry no SpeechResult
     db: Session = Depends(get_db)
 ):
-    form_data = await request.form()
-    voice_input = str(form_data.get("SpeechResult", "No speech input received"))
+    # While on hold the caller's utterance waits in a PhoneMessage with no response yet,
+    # so it never has to travel through TwiML URLs (and their logs)
+    pending_message = get_pending_message(db, thread_id) if holds else None
+    if pending_message is not None:
+        voice_input = pending_message.voice_input
+    else:
+        form_data = await request.form()
+        voice_input = str(form_data.get("SpeechResult", "No speech input received"))
 
     print(f"Received speech input: {voice_input}")
 
     # Pass thread_id to process_message
-    assistant_response = await process_message(voice_input, db, thread_id=thread_id)
+    try:
+        assistant_response = await process_message(voice_input, db, thread_id=thread_id)
+    except AdmissionRejected as e:
+        logger.warning(f"Thread {thread_id} put on hold ({e.reason}, hold {holds + 1})")
+        if holds >= PHONE_MAX_HOLDS:
+            # Give up on this utterance; the caller is asked to repeat it
+            if pending_message is not None:
+                db.delete(pending_message)
+                db.commit()
+        elif pending_message is None:
+            db.add(PhoneMessage(**PhoneMessageCreate(
+                thread_id=thread_id,
+                voice_input=voice_input,
+                assistant_response=""
+            ).dict()))
+            db.commit()
+        return hold_response(thread_id, holds)
 
     # Save the message to the database
-    new_message = PhoneMessage(**PhoneMessageCreate(
-        thread_id=thread_id,
-        voice_input=voice_input,
-        assistant_response=assistant_response
-    ).dict())
-    db.add(new_message)
+    if pending_message is not None:
+        pending_message.assistant_response = assistant_response
+    else:
+        new_message = PhoneMessage(**PhoneMessageCreate(
+            thread_id=thread_id,
+            voice_input=voice_input,
+            assistant_response=assistant_response
+        ).dict())
+        db.add(new_message)
     db.commit()
 
     voice_response = VoiceResponse()
@@ -99,4 +133,27 @@ async def handle_input(
         media_type="application/xml"
     )
 
+def get_pending_message(db: Session, thread_id: int) -> Optional[PhoneMessage]:
+    return db.query(PhoneMessage).filter(
+        PhoneMessage.thread_id == thread_id,
+        PhoneMessage.assistant_response == "",
+    ).order_by(PhoneMessage.id.desc()).first()
+
+def hold_response(thread_id: int, holds: int) -> Response:
+    voice_response = VoiceResponse()
+
+    if holds >= PHONE_MAX_HOLDS:
+        voice_response.say("Sorry, I'm having trouble keeping up right now. Could you please repeat that?")
+        voice_response.redirect(url=f"/phone/answer?thread_id={thread_id}", method="POST")
+    else:
+        if holds == 0:
+            voice_response.say("Please hold for a moment.")
+        voice_response.pause(length=PHONE_HOLD_PAUSE_SECONDS)
+        voice_response.redirect(url=f"/phone/handle-input?thread_id={thread_id}&holds={holds + 1}", method="POST")
+
+    return Response(
+        content=str(voice_response),
+        media_type="application/xml"
+    )
+
 # The last_recording_url function is no longer needed and can be removed
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+from app import schemas
+from app.database import get_db
+from app.services.search_service import search as search_index
+
+router = APIRouter()
+
+@router.get("/", response_model=List[schemas.SearchResult])
+def search(
+    q: str = Query(..., min_length=1),
+    template_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    return search_index(db, q, template_id=template_id, since=since, until=until, limit=limit)
@@ -127,5 +127,21 @@ class Thread(ThreadBase):
     class Config:
         orm_mode = True
 
+class SearchSource(str, Enum):
+    PHONE_MESSAGE = "phone_message"
+    TRANSCRIPT = "transcript"
+    FIELD_VALUE = "field_value"
+    FORM_RESPONSE = "form_response"
+
+class SearchResult(BaseModel):
+    source: SearchSource
+    source_id: int
+    thread_id: Optional[int] = None
+    response_id: Optional[int] = None
+    template_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    snippet: str
+    rank: float
+
 class SetCurrentTemplate(BaseModel):
     is_current: bool = True
@@ -0,0 +1,103 @@
+from contextlib import asynccontextmanager
+from typing import Dict, List
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Process-wide limit on concurrent model invocations. Callers beyond the limit
+# wait in a bounded queue; when the queue is full or the wait exceeds the
+# deadline the call is rejected so the caller can degrade instead of piling up.
+# The limit and metrics are per worker process: with N uvicorn workers up to
+# N x LLM_MAX_CONCURRENCY calls run at once, so size it per worker.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "5"))
+
+WAIT_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str):
+        super().__init__(f"Model invocation rejected: {reason}")
+        self.reason = reason
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted_total = 0
+        self.rejected_total: Dict[str, int] = {"queue_full": 0, "timeout": 0}
+        self.wait_seconds_sum = 0.0
+        self.wait_count = 0
+        self.wait_buckets: List[int] = [0] * len(WAIT_BUCKETS)
+
+    def _observe_wait(self, seconds: float) -> None:
+        self.wait_seconds_sum += seconds
+        self.wait_count += 1
+        for index, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                self.wait_buckets[index] += 1
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold one concurrency slot for the duration of the block, or raise AdmissionRejected."""
+        start = time.monotonic()
+        if not self._semaphore.locked():
+            # A slot is free: acquire() returns without suspending
+            await self._semaphore.acquire()
+        elif self.waiting >= self.max_queue:
+            self.rejected_total["queue_full"] += 1
+            raise AdmissionRejected("queue_full")
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                # Timed-out waits count too, or the histogram hides saturation
+                self._observe_wait(time.monotonic() - start)
+                self.rejected_total["timeout"] += 1
+                raise AdmissionRejected("timeout")
+            finally:
+                self.waiting -= 1
+
+        self._observe_wait(time.monotonic() - start)
+        self.admitted_total += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def render_metrics(self) -> str:
+        """Prometheus text exposition of this worker's saturation metrics."""
+        lines = [
+            "# TYPE llm_admission_in_flight gauge",
+            f"llm_admission_in_flight {self.in_flight}",
+            "# TYPE llm_admission_queue_depth gauge",
+            f"llm_admission_queue_depth {self.waiting}",
+            "# TYPE llm_admission_max_concurrency gauge",
+            f"llm_admission_max_concurrency {self.max_concurrency}",
+            "# TYPE llm_admission_max_queue gauge",
+            f"llm_admission_max_queue {self.max_queue}",
+            "# TYPE llm_admission_admitted_total counter",
+            f"llm_admission_admitted_total {self.admitted_total}",
+            "# TYPE llm_admission_rejected_total counter",
+        ]
+        for reason, count in self.rejected_total.items():
+            lines.append(f'llm_admission_rejected_total{{reason="{reason}"}} {count}')
+        lines.append("# TYPE llm_admission_wait_seconds histogram")
+        for bound, count in zip(WAIT_BUCKETS, self.wait_buckets):
+            lines.append(f'llm_admission_wait_seconds_bucket{{le="{bound}"}} {count}')
+        lines.append(f'llm_admission_wait_seconds_bucket{{le="+Inf"}} {self.wait_count}')
+        lines.append(f"llm_admission_wait_seconds_sum {self.wait_seconds_sum}")
+        lines.append(f"llm_admission_wait_seconds_count {self.wait_count}")
+        return "\n".join(lines) + "\n"
+
+llm_admission = AdmissionController(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT_SECONDS)
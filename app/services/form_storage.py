@@ -0,0 +1,134 @@
+from sqlalchemy import text, select, delete, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from app.models import FormResponse, FormFieldValue, FormField
+from app.schemas import FieldType
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# How answers are written: "rows" stores one FormFieldValue row per answer,
+# "document" stores one JSON document per FormResponse keyed by field id, each
+# entry {"id": value id, "v": typed value}. Value ids come from the
+# form_field_values id space, so an answer keeps one id in either layout.
+# Reads always understand both, so the mode can be switched at any time.
+FORM_VALUE_STORAGE = os.getenv("FORM_VALUE_STORAGE", "rows")
+
+def setup_document_storage(engine: Engine) -> None:
+    """Add form_responses.value_document to existing databases (idempotent)."""
+    columns = [column["name"] for column in inspect(engine).get_columns("form_responses")]
+    if "value_document" in columns:
+        return
+    column_type = "JSONB" if engine.dialect.name == "postgresql" else "JSON"
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE form_responses ADD COLUMN value_document {column_type}"))
+
+def to_document_value(field_type: Optional[FieldType], value: Any) -> Any:
+    # Keep integers and checkboxes typed in the document, but only when the typed
+    # value prints back to exactly the text the row layout would store ("007"
+    # stays "007", "true" stays "true"), so documents never change an answer.
+    if value is None:
+        return None
+    typed = value
+    if field_type == FieldType.INTEGER and not isinstance(value, bool):
+        try:
+            typed = int(value)
+        except (TypeError, ValueError):
+            pass
+    elif field_type == FieldType.CHECKBOX and str(value) in ("True", "False"):
+        typed = str(value) == "True"
+    return typed if str(typed) == str(value) and isinstance(typed, (int, bool)) else str(value)
+
+def allocate_value_ids(db: Session, count: int) -> List[int]:
+    """Reserve count ids from form_field_values' id space for document-stored values."""
+    if count == 0:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        return db.execute(
+            text("SELECT nextval(pg_get_serial_sequence('form_field_values', 'id')) FROM generate_series(1, :count)"),
+            {"count": count},
+        ).scalars().all()
+    # SQLite (local use): the table is AUTOINCREMENT, so ids taken by rows that
+    # are deleted again are never handed out twice
+    placeholders = [FormFieldValue() for _ in range(count)]
+    db.add_all(placeholders)
+    db.flush()
+    ids = [placeholder.id for placeholder in placeholders]
+    for placeholder in placeholders:
+        db.delete(placeholder)
+    db.flush()
+    return ids
+
+def document_value_to_str(value: Any) -> Optional[str]:
+    # Inverse of to_document_value: the same text the row layout stores
+    return None if value is None else str(value)
+
+def store_field_values(db: Session, form_response: FormResponse, values: Iterable[Tuple[int, Any]],
+                       field_types: Dict[int, FieldType], storage: str = FORM_VALUE_STORAGE) -> None:
+    """Attach (field_id, value) answers to form_response using the configured storage mode."""
+    if storage == "document":
+        values = list(values)
+        value_ids = allocate_value_ids(db, len(values))
+        form_response.value_document = {
+            str(field_id): {"id": value_id, "v": to_document_value(field_types.get(field_id), value)}
+            for value_id, (field_id, value) in zip(value_ids, values)
+        }
+    elif storage == "rows":
+        for field_id, value in values:
+            form_response.field_values.append(FormFieldValue(field_id=field_id, value=str(value)))
+    else:
+        raise ValueError(f"Unknown form value storage: {storage}")
+
+def migrate_to_documents(db: Session, batch_size: int = 500) -> int:
+    """Fold existing FormFieldValue rows into value_document, one batch per transaction. Returns responses migrated.
+
+    Lossless: each entry keeps its row's id, and document_value_to_str returns
+    the row's original value.
+    """
+    field_types = dict(db.execute(select(FormField.id, FormField.field_type)).all())
+    total = 0
+    while True:
+        response_ids = db.execute(
+            select(FormResponse.id)
+            .where(FormResponse.id.in_(select(FormFieldValue.response_id)))
+            .order_by(FormResponse.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not response_ids:
+            break
+
+        documents: Dict[int, Dict[str, Any]] = {response_id: {} for response_id in response_ids}
+        for value_id, response_id, field_id, value in db.execute(
+            select(FormFieldValue.id, FormFieldValue.response_id, FormFieldValue.field_id, FormFieldValue.value)
+            .where(FormFieldValue.response_id.in_(response_ids))
+            .order_by(FormFieldValue.response_id, FormFieldValue.id)
+        ):
+            documents[response_id][str(field_id)] = {"id": value_id, "v": to_document_value(field_types.get(field_id), value)}
+
+        for form_response in db.execute(select(FormResponse).where(FormResponse.id.in_(response_ids))).scalars():
+            # Rows win over any keys already in a document for the same field
+            form_response.value_document = {**(form_response.value_document or {}), **documents[form_response.id]}
+        db.execute(
+            delete(FormFieldValue)
+            .where(FormFieldValue.response_id.in_(response_ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        total += len(response_ids)
+    return total
+
+if __name__ == "__main__":
+    # python -m app.services.form_storage migrate
+    import sys
+    from app.database import SessionLocal, engine
+
+    if sys.argv[1:] != ["migrate"]:
+        sys.exit("usage: python -m app.services.form_storage migrate")
+    setup_document_storage(engine)
+    db = SessionLocal()
+    try:
+        print(f"Migrated {migrate_to_documents(db)} form responses to document storage")
+    finally:
+        db.close()
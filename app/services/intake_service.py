@@ -1,24 +1,36 @@
 from langchain_core.tools import StructuredTool
 from langchain_openai import ChatOpenAI
+from openai import DefaultAsyncHttpxClient
 from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import HumanMessage, BaseMessage
+from langchain_core.messages import HumanMessage, SystemMessage, BaseMessage
 from langgraph.graph.message import add_messages
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.managed import IsLastStep
 from pydantic import BaseModel, Field, create_model
-from typing import Dict, Any, List, Optional, Union, Sequence
+from typing import Dict, Any, List, Optional, Union, Sequence, Tuple
+from collections import OrderedDict
+from contextvars import ContextVar
 from typing_extensions import Annotated, TypedDict
 from enum import Enum
 from datetime import date
-from app.models import FormTemplate, FormField, FormResponse, FormFieldValue, Thread
+from app.models import FormTemplate, FormField, FormResponse, Thread
 from app.schemas import FieldType
+from app.services.form_storage import store_field_values, document_value_to_str
+from app.services.admission_control import llm_admission, AdmissionRejected
+import asyncio
+import httpx
+import logging
 import os
+import threading
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Set up OpenAI API key
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
 
@@ -40,9 +52,7 @@ def get_current_template(db: Session) -> FormTemplate:
         raise ValueError("No current form template found")
     return current_template
 
-def generate_form_input_class(db: Session) -> type[BaseModel]:
-    current_template = get_current_template(db)
-    
+def build_form_input_class(current_template: FormTemplate) -> type[BaseModel]:
     fields: Dict[str, Any] = {}
     for field in current_template.fields:
         field_type, field_options = get_pydantic_field_type(field)
@@ -74,13 +84,20 @@ def get_pydantic_field_type(field: FormField) -> tuple:
     else:
         return (str, {})  # Default to string for unknown types
 
-def generate_complete_form_function(db: Session, thread_id: Optional[int] = None):
-    current_template = get_current_template(db)
+# Session of the turn currently running the agent. Cached agents outlive the
+# request that built them, so the form tool looks its session up here.
+current_db: ContextVar[Session] = ContextVar("current_db")
+
+def generate_complete_form_function(thread_id: Optional[int] = None, template_id: Optional[int] = None):
 
     def complete_form(thread_id: Optional[int] = thread_id,**kwargs) -> Dict[str, Any]:
+        db = current_db.get()
+        # Resolved when the form is submitted, against the template the call started with
+        current_template = (db.get(FormTemplate, template_id) if template_id else None) or get_current_template(db)
         form_response = FormResponse(template_id=current_template.id)
         db.add(form_response)
         
+        values = []
         for field in current_template.fields:
             snake_case_name = to_snake_case(field.name)
             value = kwargs.get(snake_case_name)
@@ -90,9 +107,10 @@ def generate_complete_form_function(db: Session, thread_id: Optional[int] = None
                 elif isinstance(value, date):
                     value = value.isoformat()
                 
-                field_value = FormFieldValue(field_id=field.id, value=str(value))
-                form_response.field_values.append(field_value)
-        
+                values.append((field.id, value))
+
+        field_types = {field.id: field.field_type for field in current_template.fields}
+        store_field_values(db, form_response, values, field_types)
         db.commit()
 
         # Update the thread with the form if thread_id is provided
@@ -100,6 +118,7 @@ def generate_complete_form_function(db: Session, thread_id: Optional[int] = None
             thread = db.query(Thread).filter(Thread.id == thread_id).first()
             if thread:
                 thread.form = form_response
+                thread.completed = True
                 db.commit()
 
         return kwargs
@@ -107,10 +126,10 @@ def generate_complete_form_function(db: Session, thread_id: Optional[int] = None
     return complete_form
 
 def setup_form_tool(db: Session, thread_id: Optional[int] = None) -> StructuredTool:
-    DynamicFormInput = generate_form_input_class(db)
-    complete_form_func = generate_complete_form_function(db, thread_id)
-
     current_template = get_current_template(db)
+    DynamicFormInput = build_form_input_class(current_template)
+    complete_form_func = generate_complete_form_function(thread_id, current_template.id)
+
     form_tool = StructuredTool.from_function(
         func=complete_form_func,
         name=f"Form_Completer_{current_template.id}",
@@ -121,30 +140,110 @@ def setup_form_tool(db: Session, thread_id: Optional[int] = None) -> StructuredT
     )
     return form_tool
 
+# The OpenAI SDK drops idle connections after 5s, which is about how long the
+# greeting takes to say, so the connection warm_up_thread opens would be gone
+# before the caller's first reply. Keep idle connections long enough to span
+# the greeting, the reply and Twilio's speech recognition.
+AGENT_HTTP_KEEPALIVE_SECONDS = float(os.getenv("AGENT_HTTP_KEEPALIVE_SECONDS", "60"))
+
+def build_http_async_client() -> httpx.AsyncClient:
+    # Connection counts are the SDK's defaults
+    return DefaultAsyncHttpxClient(limits=httpx.Limits(
+        max_connections=1000, max_keepalive_connections=100, keepalive_expiry=AGENT_HTTP_KEEPALIVE_SECONDS,
+    ))
+
 # Global variables for model and memory
-model = ChatOpenAI(model="gpt-4o")
+model = ChatOpenAI(model="gpt-4o", http_async_client=build_http_async_client())
 memory = MemorySaver()
+AGENT_WARMUP_CONNECTION = os.getenv("AGENT_WARMUP_CONNECTION", "true").lower() == "true"
+AGENT_WARMUP_PROMPT_PREFIX = os.getenv("AGENT_WARMUP_PROMPT_PREFIX", "false").lower() == "true"
 system_prompt = "You are a helpful assistant named Steve required to complete intake forms for clients. Please immediately begin the intake process. Do not ask how to assist them, immediately start asking questions after you greet them. Do not stop asking questions until you've gathered all the information you need as defined in the form_completer tool schema. You previously asked the user how they were doing so be prepared to respond to that first."
 
-def get_agent_executor(db: Session, thread_id: Optional[int] = None):
+# Compiled agent and form tool per thread, built once per call instead of on
+# every turn and ahead of the first turn by warm_up_thread.
+AGENT_CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "256"))
+agent_cache: "OrderedDict[int, Tuple[Any, StructuredTool]]" = OrderedDict()
+# Used from the event loop (process_message) and from worker threads (prepare_thread)
+agent_cache_lock = threading.Lock()
+
+def get_agent_and_tool(db: Session, thread_id: Optional[int] = None) -> Tuple[Any, StructuredTool]:
+    if thread_id is not None:
+        with agent_cache_lock:
+            cached = agent_cache.get(thread_id)
+            if cached is not None:
+                agent_cache.move_to_end(thread_id)
+                return cached
 
     form_completer = setup_form_tool(db, thread_id)
     tools = [form_completer]
-    return create_react_agent(model, tools, state_modifier=system_prompt, checkpointer=memory)
+    agent_and_tool = (create_react_agent(model, tools, state_modifier=system_prompt, checkpointer=memory), form_completer)
+    if thread_id is not None:
+        with agent_cache_lock:
+            # Keep the first agent if another caller built one meanwhile
+            agent_and_tool = agent_cache.setdefault(thread_id, agent_and_tool)
+            agent_cache.move_to_end(thread_id)
+            while len(agent_cache) > AGENT_CACHE_SIZE:
+                agent_cache.popitem(last=False)
+    return agent_and_tool
+
+def get_agent_executor(db: Session, thread_id: Optional[int] = None):
+    return get_agent_and_tool(db, thread_id)[0]
+
+def prepare_thread(session_factory: sessionmaker, thread_id: int) -> StructuredTool:
+    db = session_factory()
+    try:
+        return get_agent_and_tool(db, thread_id)[1]
+    finally:
+        db.close()
+
+async def warm_up_thread(session_factory: sessionmaker, thread_id: int):
+    """Prepare a new call's first turn while the greeting plays.
+
+    Resolves the current template and builds and caches the thread's tool and
+    agent (off the event loop), opens the model's HTTP connection and, if
+    enabled, sends a one-token request with the same system prompt and tool
+    schema so the provider can cache that prompt prefix for the first real turn.
+    """
+    try:
+        form_completer = await asyncio.to_thread(prepare_thread, session_factory, thread_id)
+    except ValueError:
+        logger.warning(f"Skipping warm-up for thread {thread_id}: no current form template")
+        return
+
+    try:
+        if AGENT_WARMUP_CONNECTION:
+            await model.root_async_client.models.list()
+        if AGENT_WARMUP_PROMPT_PREFIX:
+            async with llm_admission.admit():
+                await model.bind_tools([form_completer]).ainvoke(
+                    [SystemMessage(content=system_prompt), HumanMessage(content="Hello")], max_tokens=1
+                )
+    except AdmissionRejected:
+        # Real turns take priority over speculative work
+        pass
+    except Exception:
+        logger.exception(f"Agent warm-up failed for thread {thread_id}")
 
 async def process_message(message: str, db: Session, thread_id: Optional[int] = None):
     config = {"configurable": {"thread_id": thread_id}} if thread_id else {}
     agent_executor = get_agent_executor(db, thread_id)
     response_chunks = []
-    for chunk in agent_executor.stream(
-        {"messages": [HumanMessage(content=message)]}, config
-    ):
-        if isinstance(chunk, dict) and 'agent' in chunk:
-            agent_message = chunk['agent']['messages'][0]
-            if isinstance(agent_message.content, str):
-                response_chunks.append(agent_message.content)
-        elif isinstance(chunk, str):
-            response_chunks.append(chunk)
+    # Raises AdmissionRejected when the model is saturated; callers degrade gracefully.
+    # astream keeps the event loop free so queued calls can time out while others run.
+    db_token = current_db.set(db)
+    try:
+        async with llm_admission.admit():
+            async for chunk in agent_executor.astream(
+                {"messages": [HumanMessage(content=message)]}, config
+            ):
+                if isinstance(chunk, dict) and 'agent' in chunk:
+                    agent_message = chunk['agent']['messages'][0]
+                    if isinstance(agent_message.content, str):
+                        response_chunks.append(agent_message.content)
+                elif isinstance(chunk, str):
+                    response_chunks.append(chunk)
+    finally:
+        current_db.reset(db_token)
     
     return " ".join(response_chunks)
 
@@ -156,11 +255,19 @@ def get_form_responses(thread_id: int, db: Session) -> Dict[str, Any]:
     form_response = thread.form
     template = form_response.template
     
+    values = [(field_value.field_id, field_value.value) for field_value in form_response.field_values]
+    values += [
+        (int(field_id), document_value_to_str(entry["v"]))
+        for field_id, entry in (form_response.value_document or {}).items()
+    ]
+    field_names = dict(db.execute(
+        select(FormField.id, FormField.name).where(FormField.id.in_([field_id for field_id, _ in values]))
+    ).all())
+
     responses = {}
-    for field_value in form_response.field_values:
-        field = db.query(FormField).filter(FormField.id == field_value.field_id).first()
-        if field:
-            responses[field.name] = field_value.value
+    for field_id, value in values:
+        if field_id in field_names:
+            responses[field_names[field_id]] = value
 
     return {
         "template_name": template.name,
@@ -0,0 +1,257 @@
+from sqlalchemy import text, select, delete, insert, exists
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+from psycopg2.errors import LockNotAvailable
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from app.models import Thread, PhoneMessage, PhoneMessageArchive, utc_now
+from app.services.search_service import setup_search_index
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Completed threads older than this have their phone_messages compacted into
+# Thread.transcript and the rows archived ("archive") or dropped ("delete").
+RETENTION_DAYS = int(os.getenv("PHONE_MESSAGE_RETENTION_DAYS", "30"))
+RETENTION_MODE = os.getenv("PHONE_MESSAGE_RETENTION_MODE", "archive")
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "100"))
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))  # 0 disables the job
+RETENTION_LOCK_TIMEOUT_MS = int(os.getenv("RETENTION_LOCK_TIMEOUT_MS", "2000"))
+PARTITION_MONTHS_AHEAD = int(os.getenv("PHONE_MESSAGE_PARTITION_MONTHS_AHEAD", "2"))
+
+def format_transcript(messages: List[PhoneMessage]) -> str:
+    lines = []
+    for message in messages:
+        if message.voice_input:
+            lines.append(f"Caller: {message.voice_input}")
+        if message.assistant_response:
+            lines.append(f"Assistant: {message.assistant_response}")
+    return "\n".join(lines)
+
+def compact_thread_batch(db: Session, cutoff: datetime, batch_size: int = RETENTION_BATCH_SIZE,
+                         mode: str = RETENTION_MODE) -> int:
+    """Compact one batch of completed threads last updated before cutoff. Returns threads compacted."""
+    if mode not in ("archive", "delete"):
+        raise ValueError(f"Unknown retention mode: {mode}")
+
+    is_postgres = db.get_bind().dialect.name == "postgresql"
+    if is_postgres:
+        # Give up instead of queueing behind live traffic; the next run retries
+        db.execute(text(f"SET LOCAL lock_timeout = '{RETENTION_LOCK_TIMEOUT_MS}ms'"))
+
+    threads = db.execute(
+        select(Thread)
+        .where(
+            Thread.completed == True,
+            Thread.updated_at < cutoff,
+            exists().where(PhoneMessage.thread_id == Thread.id),
+        )
+        .order_by(Thread.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not threads:
+        db.rollback()
+        return 0
+
+    thread_ids = [thread.id for thread in threads]
+    messages_by_thread: Dict[int, List[PhoneMessage]] = {thread_id: [] for thread_id in thread_ids}
+    for message in db.execute(
+        select(PhoneMessage)
+        .where(PhoneMessage.thread_id.in_(thread_ids))
+        .order_by(PhoneMessage.thread_id, PhoneMessage.created_at, PhoneMessage.id)
+    ).scalars():
+        messages_by_thread[message.thread_id].append(message)
+
+    for thread in threads:
+        compacted = format_transcript(messages_by_thread[thread.id])
+        thread.transcript = f"{thread.transcript}\n{compacted}" if thread.transcript else compacted
+
+    if mode == "archive":
+        db.execute(insert(PhoneMessageArchive).from_select(
+            ["id", "thread_id", "voice_input", "assistant_response", "created_at"],
+            select(
+                PhoneMessage.id,
+                PhoneMessage.thread_id,
+                PhoneMessage.voice_input,
+                PhoneMessage.assistant_response,
+                PhoneMessage.created_at,
+            ).where(PhoneMessage.thread_id.in_(thread_ids)),
+        ))
+    db.execute(
+        delete(PhoneMessage).where(PhoneMessage.thread_id.in_(thread_ids)).execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return len(threads)
+
+def _is_lock_timeout(error: OperationalError) -> bool:
+    return isinstance(error.orig, LockNotAvailable)
+
+def compact_completed_threads(db: Session, older_than: timedelta = timedelta(days=RETENTION_DAYS),
+                              batch_size: int = RETENTION_BATCH_SIZE, mode: str = RETENTION_MODE) -> int:
+    """Run compaction batches until no eligible thread is left. Each batch is its own short transaction."""
+    cutoff = utc_now() - older_than
+    total = 0
+    while True:
+        try:
+            compacted = compact_thread_batch(db, cutoff, batch_size, mode)
+        except OperationalError as e:
+            db.rollback()
+            if not _is_lock_timeout(e):
+                raise
+            logger.warning("Retention batch hit a lock timeout, retrying on the next run")
+            break
+        total += compacted
+        if compacted < batch_size:
+            break
+    return total
+
+# Time partitioning of phone_messages (Postgres only)
+
+def _as_utc(value: datetime) -> datetime:
+    # Postgres returns timestamptz in the session's time zone; partitions are bounded in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _month_start(value: datetime) -> datetime:
+    value = _as_utc(value)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+def _next_month(value: datetime) -> datetime:
+    value = _as_utc(value)
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+def _partition_name(month: datetime) -> str:
+    return f"phone_messages_y{month.year}m{month.month:02d}"
+
+def _is_partitioned(conn) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('phone_messages')"
+    )).first() is not None
+
+def _create_month_partitions(conn, table: str, start: datetime, end: datetime) -> None:
+    month = _month_start(start)
+    while month < end:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_partition_name(month)} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+        ))
+        month = _next_month(month)
+
+def partition_phone_messages(engine: Engine, months_ahead: int = PARTITION_MONTHS_AHEAD) -> bool:
+    """One-off migration of phone_messages to a table range-partitioned by month on created_at.
+
+    Takes an exclusive lock for the copy, so run it during a maintenance window.
+    Returns False if the table is already partitioned or the database is not Postgres.
+    """
+    if engine.dialect.name != "postgresql":
+        return False
+
+    with engine.begin() as conn:
+        if _is_partitioned(conn):
+            return False
+
+        conn.execute(text("LOCK TABLE phone_messages IN ACCESS EXCLUSIVE MODE"))
+        oldest = conn.execute(text("SELECT min(created_at) FROM phone_messages")).scalar() or utc_now()
+        now = utc_now()
+
+        conn.execute(text(
+            "CREATE TABLE phone_messages_partitioned (LIKE phone_messages INCLUDING DEFAULTS INCLUDING GENERATED) "
+            "PARTITION BY RANGE (created_at)"
+        ))
+        conn.execute(text("ALTER TABLE phone_messages_partitioned ADD PRIMARY KEY (id, created_at)"))
+        conn.execute(text(
+            "ALTER TABLE phone_messages_partitioned ADD FOREIGN KEY (thread_id) REFERENCES threads (id)"
+        ))
+        conn.execute(text("CREATE TABLE phone_messages_default PARTITION OF phone_messages_partitioned DEFAULT"))
+        _create_month_partitions(conn, "phone_messages_partitioned", oldest, _next_month(now) + timedelta(days=31 * months_ahead))
+
+        conn.execute(text(
+            "INSERT INTO phone_messages_partitioned (id, thread_id, voice_input, assistant_response, created_at) "
+            "SELECT id, thread_id, voice_input, assistant_response, coalesce(created_at, now()) FROM phone_messages"
+        ))
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence('phone_messages', 'id')")).scalar()
+        if sequence:
+            conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY phone_messages_partitioned.id"))
+        conn.execute(text("DROP TABLE phone_messages"))
+        conn.execute(text("ALTER TABLE phone_messages_partitioned RENAME TO phone_messages"))
+        conn.execute(text("CREATE INDEX ix_phone_messages_id ON phone_messages (id)"))
+        conn.execute(text("CREATE INDEX ix_phone_messages_thread_id ON phone_messages (thread_id)"))
+
+    setup_search_index(engine)
+    return True
+
+def maintain_phone_message_partitions(engine: Engine, months_ahead: int = PARTITION_MONTHS_AHEAD,
+                                      older_than: timedelta = timedelta(days=RETENTION_DAYS)) -> None:
+    """Create upcoming monthly partitions and drop past ones emptied by compaction."""
+    if engine.dialect.name != "postgresql":
+        return
+
+    with engine.begin() as conn:
+        if not _is_partitioned(conn):
+            return
+        conn.execute(text(f"SET LOCAL lock_timeout = '{RETENTION_LOCK_TIMEOUT_MS}ms'"))
+
+        now = utc_now()
+        _create_month_partitions(conn, "phone_messages", now, _next_month(now) + timedelta(days=31 * months_ahead))
+
+        cutoff_month = _month_start(now - older_than)
+        partitions = conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass('phone_messages') "
+            "AND child.relname LIKE 'phone_messages_y%'"
+        )).scalars().all()
+        for name in partitions:
+            month = datetime(int(name[len("phone_messages_y"):][:4]), int(name[-2:]), 1, tzinfo=timezone.utc)
+            if _next_month(month) > cutoff_month:
+                continue
+            if conn.execute(text(f"SELECT 1 FROM {name} LIMIT 1")).first() is None:
+                conn.execute(text(f"DROP TABLE {name}"))
+
+# Background job
+
+def run_retention(session_factory: sessionmaker, engine: Engine) -> int:
+    db = session_factory()
+    try:
+        compacted = compact_completed_threads(db)
+    finally:
+        db.close()
+    try:
+        maintain_phone_message_partitions(engine)
+    except OperationalError as e:
+        if not _is_lock_timeout(e):
+            raise
+        logger.warning("Partition maintenance hit a lock timeout, retrying on the next run")
+    if compacted:
+        logger.info(f"Retention compacted {compacted} threads")
+    return compacted
+
+async def retention_loop(session_factory: sessionmaker, engine: Engine,
+                         interval_seconds: int = RETENTION_INTERVAL_SECONDS):
+    while True:
+        try:
+            await asyncio.to_thread(run_retention, session_factory, engine)
+        except Exception:
+            logger.exception("Retention run failed")
+        await asyncio.sleep(interval_seconds)
+
+def start_retention_job(session_factory: sessionmaker, engine: Engine) -> Optional[asyncio.Task]:
+    if RETENTION_INTERVAL_SECONDS <= 0:
+        return None
+    return asyncio.create_task(retention_loop(session_factory, engine))
+
+if __name__ == "__main__":
+    # python -m app.services.retention_service [partition]
+    import sys
+    from app.database import SessionLocal, engine
+
+    if sys.argv[1:] == ["partition"]:
+        print("Partitioned phone_messages" if partition_phone_messages(engine) else "Nothing to do")
+    else:
+        print(f"Compacted {run_retention(SessionLocal, engine)} threads")
@@ -0,0 +1,347 @@
+from sqlalchemy import text, bindparam, DateTime, Integer, String, Float
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timezone
+
+# Full-text search over phone messages, compacted thread transcripts, form field
+# values and response value documents.
+#
+# Postgres keeps a stored generated tsvector column on each searched table with a
+# GIN index on it, so matching and ranking read the precomputed vector instead of
+# parsing the text of every candidate row. SQLite (local use) uses FTS5 tables
+# kept in sync by triggers.
+
+SEARCH_LANGUAGE = "english"
+
+# Table -> text the search_vector column is generated from
+POSTGRES_SEARCH_DOCUMENTS = {
+    "phone_messages": "coalesce(voice_input, '') || ' ' || coalesce(assistant_response, '')",
+    "threads": "coalesce(transcript, '')",
+    "form_field_values": "coalesce(value, '')",
+    "form_responses": "coalesce(value_document, '{}'::jsonb)",
+}
+
+PHONE_MESSAGE_DOCUMENT = "coalesce(m.voice_input, '') || ' ' || coalesce(m.assistant_response, '')"
+TRANSCRIPT_DOCUMENT = "coalesce(t.transcript, '')"
+FIELD_VALUE_DOCUMENT = "coalesce(v.value, '')"
+
+# Expression indexes used before the stored columns existed
+POSTGRES_LEGACY_INDEXES = [
+    "ix_phone_messages_search", "ix_threads_transcript_search",
+    "ix_form_field_values_search", "ix_form_responses_search",
+]
+
+def _postgres_index_statements() -> List[str]:
+    statements = [f"DROP INDEX IF EXISTS {index}" for index in POSTGRES_LEGACY_INDEXES]
+    for table, document in POSTGRES_SEARCH_DOCUMENTS.items():
+        # Adding the column rewrites the table once; afterwards Postgres maintains it
+        statements.append(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_LANGUAGE}', {document})) STORED"
+        )
+        statements.append(f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING GIN (search_vector)")
+    return statements
+
+SQLITE_DOCUMENT_TEXT = (
+    "(SELECT group_concat(json_extract(value, '$.v'), ' ') FROM json_each({document}) "
+    "WHERE json_type(value, '$.v') = 'text')"
+)
+
+SQLITE_FTS_TABLES = {
+    "phone_messages_fts": [
+        """
+        CREATE VIRTUAL TABLE phone_messages_fts USING fts5(
+            voice_input, assistant_response,
+            content='phone_messages', content_rowid='id', tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS phone_messages_fts_ai AFTER INSERT ON phone_messages BEGIN
+            INSERT INTO phone_messages_fts(rowid, voice_input, assistant_response)
+            VALUES (new.id, new.voice_input, new.assistant_response);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS phone_messages_fts_ad AFTER DELETE ON phone_messages BEGIN
+            INSERT INTO phone_messages_fts(phone_messages_fts, rowid, voice_input, assistant_response)
+            VALUES ('delete', old.id, old.voice_input, old.assistant_response);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS phone_messages_fts_au AFTER UPDATE ON phone_messages BEGIN
+            INSERT INTO phone_messages_fts(phone_messages_fts, rowid, voice_input, assistant_response)
+            VALUES ('delete', old.id, old.voice_input, old.assistant_response);
+            INSERT INTO phone_messages_fts(rowid, voice_input, assistant_response)
+            VALUES (new.id, new.voice_input, new.assistant_response);
+        END
+        """,
+    ],
+    "threads_fts": [
+        """
+        CREATE VIRTUAL TABLE threads_fts USING fts5(
+            transcript,
+            content='threads', content_rowid='id', tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS threads_fts_ai AFTER INSERT ON threads BEGIN
+            INSERT INTO threads_fts(rowid, transcript) VALUES (new.id, new.transcript);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS threads_fts_ad AFTER DELETE ON threads BEGIN
+            INSERT INTO threads_fts(threads_fts, rowid, transcript) VALUES ('delete', old.id, old.transcript);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS threads_fts_au AFTER UPDATE OF transcript ON threads BEGIN
+            INSERT INTO threads_fts(threads_fts, rowid, transcript) VALUES ('delete', old.id, old.transcript);
+            INSERT INTO threads_fts(rowid, transcript) VALUES (new.id, new.transcript);
+        END
+        """,
+    ],
+    "form_field_values_fts": [
+        """
+        CREATE VIRTUAL TABLE form_field_values_fts USING fts5(
+            value,
+            content='form_field_values', content_rowid='id', tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS form_field_values_fts_ai AFTER INSERT ON form_field_values BEGIN
+            INSERT INTO form_field_values_fts(rowid, value) VALUES (new.id, new.value);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS form_field_values_fts_ad AFTER DELETE ON form_field_values BEGIN
+            INSERT INTO form_field_values_fts(form_field_values_fts, rowid, value) VALUES ('delete', old.id, old.value);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS form_field_values_fts_au AFTER UPDATE ON form_field_values BEGIN
+            INSERT INTO form_field_values_fts(form_field_values_fts, rowid, value) VALUES ('delete', old.id, old.value);
+            INSERT INTO form_field_values_fts(rowid, value) VALUES (new.id, new.value);
+        END
+        """,
+    ],
+    # Stores its own text (not external content): the concatenated string values of
+    # value_document entries, matching to_tsvector(jsonb) on Postgres, so keys and JSON
+    # syntax are neither searchable nor shown in snippets
+    "form_responses_fts": [
+        """
+        CREATE VIRTUAL TABLE form_responses_fts USING fts5(value_text, tokenize='porter unicode61')
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS form_responses_fts_ai AFTER INSERT ON form_responses
+        WHEN new.value_document IS NOT NULL BEGIN
+            INSERT INTO form_responses_fts(rowid, value_text) VALUES (new.id, {SQLITE_DOCUMENT_TEXT.format(document="new.value_document")});
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS form_responses_fts_ad AFTER DELETE ON form_responses BEGIN
+            DELETE FROM form_responses_fts WHERE rowid = old.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS form_responses_fts_au AFTER UPDATE OF value_document ON form_responses BEGIN
+            DELETE FROM form_responses_fts WHERE rowid = old.id;
+            INSERT INTO form_responses_fts(rowid, value_text)
+            SELECT new.id, {SQLITE_DOCUMENT_TEXT.format(document="new.value_document")} WHERE new.value_document IS NOT NULL;
+        END
+        """,
+    ],
+}
+
+SQLITE_FTS_BACKFILL = {
+    "form_responses_fts": f"""
+        INSERT INTO form_responses_fts(rowid, value_text)
+        SELECT id, {SQLITE_DOCUMENT_TEXT.format(document="value_document")} FROM form_responses
+        WHERE value_document IS NOT NULL
+    """,
+}
+
+def setup_search_index(engine: Engine) -> None:
+    """Create the full-text index structures for the engine's dialect (idempotent)."""
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            for statement in _postgres_index_statements():
+                conn.execute(text(statement))
+        elif dialect == "sqlite":
+            for table, statements in SQLITE_FTS_TABLES.items():
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": table},
+                ).first()
+                for statement in statements:
+                    if exists and statement.strip().startswith("CREATE VIRTUAL TABLE"):
+                        continue
+                    conn.execute(text(statement))
+                if not exists:
+                    # Backfill rows written before the index existed
+                    conn.execute(text(SQLITE_FTS_BACKFILL.get(table, f"INSERT INTO {table}({table}) VALUES ('rebuild')")))
+
+def _filters(template_clause: str, date_column: str, template_id: Optional[int],
+             since: Optional[datetime], until: Optional[datetime]) -> str:
+    clauses = []
+    if template_id is not None:
+        clauses.append(template_clause)
+    if since is not None:
+        clauses.append(f"{date_column} >= :since")
+    if until is not None:
+        clauses.append(f"{date_column} < :until")
+    return "".join(f" AND {clause}" for clause in clauses)
+
+def _postgres_top_matches(table: str, columns: str, filters: str, tsquery: str) -> str:
+    # Rank and cut each source on its own table before joining, so the joins only
+    # touch the rows that can make it into the result
+    return f"""(
+                SELECT {columns}, ts_rank(search_vector, {tsquery}) AS rank
+                FROM {table}
+                WHERE search_vector @@ {tsquery}{filters}
+                ORDER BY rank DESC
+                LIMIT :limit
+            )"""
+
+def _postgres_search_sql(template_id, since, until) -> str:
+    # The tsquery is written inline in each branch so the planner sees its value there
+    tsquery = f"websearch_to_tsquery('{SEARCH_LANGUAGE}', :query)"
+    message_filters = _filters(
+        "thread_id IN (SELECT t.id FROM threads t JOIN form_responses r ON r.id = t.form_id WHERE r.template_id = :template_id)",
+        "created_at", template_id, since, until,
+    )
+    transcript_filters = _filters(
+        "form_id IN (SELECT id FROM form_responses WHERE template_id = :template_id)",
+        "created_at", template_id, since, until,
+    )
+    response_filters = _filters("template_id = :template_id", "submitted_at", template_id, since, until)
+    value_filters = f" AND response_id IN (SELECT id FROM form_responses WHERE true{response_filters})" if response_filters else ""
+    messages = _postgres_top_matches(
+        "phone_messages", "id, thread_id, created_at, voice_input, assistant_response", message_filters, tsquery)
+    transcripts = _postgres_top_matches("threads", "id, form_id, created_at, transcript", transcript_filters, tsquery)
+    values = _postgres_top_matches("form_field_values", "id, response_id, value", value_filters, tsquery)
+    responses = _postgres_top_matches(
+        "form_responses", "id, template_id, submitted_at, value_document", response_filters, tsquery)
+    # Snippets are built only for the rows that survive the final LIMIT
+    return f"""
+        SELECT hits.source, hits.source_id, hits.thread_id, hits.response_id, hits.template_id, hits.created_at,
+               ts_headline('{SEARCH_LANGUAGE}', hits.document, {tsquery}) AS snippet, hits.rank
+        FROM (
+            SELECT 'phone_message' AS source, m.id AS source_id, m.thread_id, t.form_id AS response_id,
+                   r.template_id, m.created_at, {PHONE_MESSAGE_DOCUMENT} AS document, m.rank
+            FROM {messages} m
+            LEFT JOIN threads t ON t.id = m.thread_id
+            LEFT JOIN form_responses r ON r.id = t.form_id
+            UNION ALL
+            SELECT 'transcript' AS source, t.id AS source_id, t.id AS thread_id, t.form_id AS response_id,
+                   r.template_id, t.created_at, {TRANSCRIPT_DOCUMENT} AS document, t.rank
+            FROM {transcripts} t
+            LEFT JOIN form_responses r ON r.id = t.form_id
+            UNION ALL
+            SELECT 'field_value' AS source, v.id AS source_id, t.id AS thread_id, v.response_id,
+                   r.template_id, r.submitted_at AS created_at, {FIELD_VALUE_DOCUMENT} AS document, v.rank
+            FROM {values} v
+            JOIN form_responses r ON r.id = v.response_id
+            LEFT JOIN threads t ON t.form_id = r.id
+            UNION ALL
+            SELECT 'form_response' AS source, r.id AS source_id, t.id AS thread_id, r.id AS response_id,
+                   r.template_id, r.submitted_at AS created_at,
+                   (SELECT string_agg(entry ->> 'v', ' ') FROM jsonb_each(r.value_document) AS d(key, entry)) AS document, r.rank
+            FROM {responses} r
+            LEFT JOIN threads t ON t.form_id = r.id
+            ORDER BY rank DESC
+            LIMIT :limit
+        ) hits
+        ORDER BY hits.rank DESC
+    """
+
+def _sqlite_search_sql(template_id, since, until) -> str:
+    template_clause = "r.template_id = :template_id"
+    message_filters = _filters(template_clause, "m.created_at", template_id, since, until)
+    transcript_filters = _filters(template_clause, "t.created_at", template_id, since, until)
+    value_filters = _filters(template_clause, "r.submitted_at", template_id, since, until)
+    return f"""
+        SELECT * FROM (
+            SELECT 'phone_message' AS source, m.id AS source_id, m.thread_id, t.form_id AS response_id,
+                   r.template_id, m.created_at,
+                   snippet(phone_messages_fts, -1, '<b>', '</b>', '...', 16) AS snippet,
+                   -bm25(phone_messages_fts) AS rank
+            FROM phone_messages_fts
+            JOIN phone_messages m ON m.id = phone_messages_fts.rowid
+            LEFT JOIN threads t ON t.id = m.thread_id
+            LEFT JOIN form_responses r ON r.id = t.form_id
+            WHERE phone_messages_fts MATCH :query{message_filters}
+            UNION ALL
+            SELECT 'transcript' AS source, t.id AS source_id, t.id AS thread_id, t.form_id AS response_id,
+                   r.template_id, t.created_at,
+                   snippet(threads_fts, -1, '<b>', '</b>', '...', 16) AS snippet,
+                   -bm25(threads_fts) AS rank
+            FROM threads_fts
+            JOIN threads t ON t.id = threads_fts.rowid
+            LEFT JOIN form_responses r ON r.id = t.form_id
+            WHERE threads_fts MATCH :query{transcript_filters}
+            UNION ALL
+            SELECT 'field_value' AS source, v.id AS source_id, t.id AS thread_id, v.response_id,
+                   r.template_id, r.submitted_at AS created_at,
+                   snippet(form_field_values_fts, -1, '<b>', '</b>', '...', 16) AS snippet,
+                   -bm25(form_field_values_fts) AS rank
+            FROM form_field_values_fts
+            JOIN form_field_values v ON v.id = form_field_values_fts.rowid
+            JOIN form_responses r ON r.id = v.response_id
+            LEFT JOIN threads t ON t.form_id = r.id
+            WHERE form_field_values_fts MATCH :query{value_filters}
+            UNION ALL
+            SELECT 'form_response' AS source, r.id AS source_id, t.id AS thread_id, r.id AS response_id,
+                   r.template_id, r.submitted_at AS created_at,
+                   snippet(form_responses_fts, -1, '<b>', '</b>', '...', 16) AS snippet,
+                   -bm25(form_responses_fts) AS rank
+            FROM form_responses_fts
+            JOIN form_responses r ON r.id = form_responses_fts.rowid
+            LEFT JOIN threads t ON t.form_id = r.id
+            WHERE form_responses_fts MATCH :query{value_filters}
+        )
+        ORDER BY rank DESC
+        LIMIT :limit
+    """
+
+def to_fts5_query(query: str) -> str:
+    # Quote every term so user input can't trip FTS5 query syntax; terms are ANDed
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+def search(db: Session, query: str, template_id: Optional[int] = None, since: Optional[datetime] = None,
+           until: Optional[datetime] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    if not query.strip():
+        return []
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        sql = _postgres_search_sql(template_id, since, until)
+    elif dialect == "sqlite":
+        sql = _sqlite_search_sql(template_id, since, until)
+        query = to_fts5_query(query)
+    else:
+        raise ValueError(f"Full-text search is not supported on {dialect}")
+
+    # Stored timestamps are UTC; SQLite compares them as text, so offsets must match
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc)
+    if until is not None and until.tzinfo is not None:
+        until = until.astimezone(timezone.utc)
+
+    params: Dict[str, Any] = {"query": query, "limit": limit}
+    bind_params = []
+    if template_id is not None:
+        params["template_id"] = template_id
+    if since is not None:
+        params["since"] = since
+        bind_params.append(bindparam("since", type_=DateTime(timezone=True)))
+    if until is not None:
+        params["until"] = until
+        bind_params.append(bindparam("until", type_=DateTime(timezone=True)))
+
+    statement = text(sql).bindparams(*bind_params).columns(
+        source=String, source_id=Integer, thread_id=Integer, response_id=Integer,
+        template_id=Integer, created_at=DateTime(timezone=True), snippet=String, rank=Float,
+    )
+    return [dict(row) for row in db.execute(statement, params).mappings()]
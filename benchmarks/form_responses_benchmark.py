@@ -0,0 +1,124 @@
+"""Compare the ORM/pydantic and the column/orjson read paths for GET /forms/responses.
+
+Usage: python -m benchmarks.form_responses_benchmark [--responses 10000] [--fields 10]
+
+Uses DATABASE_URL when set, otherwise a local SQLite file. Seeds a dedicated
+benchmark template the first time it runs.
+"""
+import argparse
+import json
+import os
+import orjson
+import time
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import joinedload
+
+from app import models, schemas
+from app.database import SessionLocal, engine
+from app.routers.forms import serialize_form_responses
+
+BENCHMARK_TEMPLATE_NAME = "benchmark_form_responses"
+
+def seed(db, responses: int, fields: int) -> None:
+    template = db.query(models.FormTemplate).filter(models.FormTemplate.name == BENCHMARK_TEMPLATE_NAME).first()
+    if template is None:
+        template = models.FormTemplate(name=BENCHMARK_TEMPLATE_NAME, description="Benchmark data")
+        db.add(template)
+        db.flush()
+        for order in range(fields):
+            db.add(models.FormField(
+                template_id=template.id,
+                name=f"Field {order}",
+                field_type=models.FieldType.STRING,
+                order=order,
+            ))
+        db.commit()
+
+    field_ids = [field.id for field in template.fields]
+    existing = db.query(models.FormResponse).filter(models.FormResponse.template_id == template.id).count()
+    for index in range(existing, responses):
+        response = models.FormResponse(template_id=template.id)
+        response.field_values = [
+            models.FormFieldValue(field_id=field_id, value=f"value {index}-{field_id}")
+            for field_id in field_ids
+        ]
+        db.add(response)
+        db.add(models.Thread(completed=True, form=response))
+        if index % 1000 == 0:
+            db.commit()
+    db.commit()
+
+def orm_path(db, limit: int) -> bytes:
+    # The previous implementation of GET /forms/responses
+    responses = db.query(models.FormResponse).options(
+        joinedload(models.FormResponse.field_values).joinedload(models.FormFieldValue.field),
+        joinedload(models.FormResponse.thread)
+    ).offset(0).limit(limit).all()
+
+    for response in responses:
+        response.thread_id = response.thread.id if response.thread else None
+
+    # What FastAPI does with a response_model: validate, serialize to JSON-able
+    # Python, then JSONResponse.render (stdlib json)
+    adapter = TypeAdapter(List[schemas.FormResponse])
+    content = adapter.dump_python(adapter.validate_python(responses, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def fast_path(db, limit: int) -> bytes:
+    return serialize_form_responses(db, 0, limit)
+
+def normalized(body: bytes):
+    responses = sorted(orjson.loads(body), key=lambda response: response["id"])
+    for response in responses:
+        response["field_values"].sort(key=lambda field_value: field_value["id"])
+    return responses
+
+def check_equivalent(limit: int) -> None:
+    db = SessionLocal()
+    try:
+        orm, fast = normalized(orm_path(db, limit)), normalized(fast_path(db, limit))
+    finally:
+        db.close()
+    assert orm == fast, "ORM and fast paths returned different JSON"
+    print(f"outputs match ({len(fast)} responses)")
+
+def timed(label: str, func, limit: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            body = func(db, limit)
+            timings.append(time.perf_counter() - start)
+        finally:
+            db.close()
+    best = min(timings)
+    print(f"{label:>6}: best {best * 1000:8.1f} ms, median {sorted(timings)[len(timings) // 2] * 1000:8.1f} ms ({len(body)} bytes)")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--responses", type=int, default=10000)
+    parser.add_argument("--fields", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed(db, args.responses, args.fields)
+    finally:
+        db.close()
+
+    print(f"GET /forms/responses, limit={args.responses}, {args.fields} fields per response")
+    check_equivalent(args.responses)
+    orm = timed("orm", orm_path, args.responses, args.repeat)
+    fast = timed("fast", fast_path, args.responses, args.repeat)
+    print(f"speedup: {orm / fast:.1f}x")
+
+if __name__ == "__main__":
+    main()
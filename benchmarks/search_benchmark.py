@@ -0,0 +1,101 @@
+"""Plan and time GET /search on PostgreSQL with millions of phone messages.
+
+Usage: python -m benchmarks.search_benchmark [--messages 2000000] [--repeat 5]
+
+Needs DATABASE_URL pointing at a scratch PostgreSQL database: it bulk-inserts
+synthetic threads and phone messages the first time it runs. Prints
+EXPLAIN (ANALYZE, BUFFERS) and the best/median time of search() for a term
+found in a fifth of the messages and for a rare one.
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import text
+
+from app import models
+from app.database import SessionLocal, engine
+from app.services.form_storage import setup_document_storage
+from app.services.search_service import setup_search_index, search, _postgres_search_sql
+
+WORDS = [
+    "back", "shoulder", "headache", "fever", "cough", "allergy", "insurance", "appointment",
+    "medication", "dizzy", "nausea", "ankle", "wrist", "sleep", "tired", "rash",
+]
+MESSAGES_PER_THREAD = 20
+QUERIES = {"common": "knee", "rare": "tinnitus"}
+
+def seed(db, messages: int) -> None:
+    existing = db.execute(text("SELECT count(*) FROM phone_messages")).scalar()
+    if existing >= messages:
+        return
+    words = "ARRAY[" + ", ".join(f"'{word}'" for word in WORDS) + "]"
+    threads = (messages - existing) // MESSAGES_PER_THREAD + 1
+    first_thread = db.execute(text(
+        "INSERT INTO threads (created_at, updated_at, completed) "
+        "SELECT now() - (g % 365) * interval '1 day', now(), true FROM generate_series(1, :threads) g "
+        "RETURNING id"
+    ), {"threads": threads}).scalars().all()[0]
+    # One message in five mentions a knee, one in ten thousand tinnitus
+    db.execute(text(f"""
+        INSERT INTO phone_messages (thread_id, voice_input, assistant_response, created_at)
+        SELECT :first_thread + g / {MESSAGES_PER_THREAD},
+               'My ' || ({words})[1 + g % {len(WORDS)}] || ' and ' || ({words})[1 + (g / {len(WORDS)}) % {len(WORDS)}]
+                   || ' have been bad for ' || (g % 28 + 1) || ' days'
+                   || CASE WHEN g % 5 = 0 THEN ', and my knee hurts when I walk' ELSE '' END
+                   || CASE WHEN g % 10000 = 0 THEN ', and I have tinnitus' ELSE '' END,
+               'Thanks, I have noted that. When did the ' || ({words})[1 + g % {len(WORDS)}] || ' start?',
+               now() - (g % 365) * interval '1 day'
+        FROM generate_series(0, :count - 1) g
+    """), {"first_thread": first_thread, "count": messages - existing})
+    db.commit()
+    db.execute(text("ANALYZE"))
+
+def explain(db, query: str, limit: int) -> str:
+    plan = db.execute(
+        text("EXPLAIN (ANALYZE, BUFFERS) " + _postgres_search_sql(None, None, None)),
+        {"query": query, "limit": limit},
+    ).scalars().all()
+    return "\n".join(plan)
+
+def timed(query: str, limit: int, repeat: int) -> None:
+    timings = []
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            results = search(db, query, limit=limit)
+            timings.append(time.perf_counter() - start)
+        finally:
+            db.close()
+    print(f"{query!r}: best {min(timings) * 1000:.1f} ms, median {sorted(timings)[len(timings) // 2] * 1000:.1f} ms ({len(results)} results)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Set DATABASE_URL to a scratch PostgreSQL database")
+
+    models.Base.metadata.create_all(bind=engine)
+    setup_document_storage(engine)
+    setup_search_index(engine)
+    db = SessionLocal()
+    try:
+        seed(db, args.messages)
+        total = db.execute(text("SELECT count(*) FROM phone_messages")).scalar()
+        print(f"GET /search over {total} phone messages, limit={args.limit}")
+        for label, query in QUERIES.items():
+            print(f"\n{label} term {query!r}:\n{explain(db, query, args.limit)}")
+    finally:
+        db.close()
+
+    print()
+    for query in QUERIES.values():
+        timed(query, args.limit, args.repeat)
+
+if __name__ == "__main__":
+    main()
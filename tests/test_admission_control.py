@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.models import Thread, PhoneMessage
+from app.routers import phone_intake
+from app.services.admission_control import AdmissionController, AdmissionRejected
+
+def run_burst(controller, jobs, duration):
+    results = []
+
+    async def job(index):
+        try:
+            async with controller.admit():
+                await asyncio.sleep(duration)
+                results.append("ok")
+        except AdmissionRejected as e:
+            results.append(e.reason)
+
+    async def burst():
+        await asyncio.gather(*[job(index) for index in range(jobs)])
+
+    asyncio.run(burst())
+    return sorted(results)
+
+def test_rejects_beyond_queue_and_deadline():
+    controller = AdmissionController(max_concurrency=2, max_queue=2, queue_timeout=0.05)
+
+    assert run_burst(controller, jobs=6, duration=0.2) == ["ok", "ok", "queue_full", "queue_full", "timeout", "timeout"]
+    assert controller.in_flight == 0 and controller.waiting == 0
+
+def test_wait_histogram_includes_timed_out_waits():
+    controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+
+    run_burst(controller, jobs=2, duration=0.2)
+
+    metrics = controller.render_metrics()
+    assert "llm_admission_wait_seconds_count 2" in metrics
+    assert 'llm_admission_rejected_total{reason="timeout"} 1' in metrics
+    assert controller.wait_seconds_sum >= 0.05
+
+@pytest.fixture
+def phone_client(db):
+    app = FastAPI()
+    app.include_router(phone_intake.router, prefix="/phone")
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+def test_hold_keeps_utterance_out_of_twiml(db, phone_client, monkeypatch):
+    thread = Thread(completed=False)
+    db.add(thread)
+    db.commit()
+    utterance = "I injured my left knee last week"
+
+    async def saturated(*args, **kwargs):
+        raise AdmissionRejected("timeout")
+    monkeypatch.setattr(phone_intake, "process_message", saturated)
+    held = phone_client.post(f"/phone/handle-input?thread_id={thread.id}", data={"SpeechResult": utterance})
+
+    assert "<Pause" in held.text and "holds=1" in held.text
+    assert "knee" not in held.text
+    pending = db.query(PhoneMessage).filter(PhoneMessage.thread_id == thread.id).one()
+    assert (pending.voice_input, pending.assistant_response) == (utterance, "")
+
+    seen = []
+    async def answered(message, db, thread_id=None):
+        seen.append(message)
+        return "When did it start?"
+    monkeypatch.setattr(phone_intake, "process_message", answered)
+    resumed = phone_client.post(f"/phone/handle-input?thread_id={thread.id}&holds=1")
+
+    assert seen == [utterance]
+    assert "When did it start?" in resumed.text
+    message = db.query(PhoneMessage).filter(PhoneMessage.thread_id == thread.id).one()
+    assert (message.voice_input, message.assistant_response) == (utterance, "When did it start?")
+
+def test_gives_up_after_max_holds(db, phone_client, monkeypatch):
+    thread = Thread(completed=False)
+    db.add(thread)
+    db.add(PhoneMessage(thread=thread, voice_input="My knee hurts", assistant_response=""))
+    db.commit()
+
+    async def saturated(*args, **kwargs):
+        raise AdmissionRejected("queue_full")
+    monkeypatch.setattr(phone_intake, "process_message", saturated)
+    response = phone_client.post(f"/phone/handle-input?thread_id={thread.id}&holds={phone_intake.PHONE_MAX_HOLDS}")
+
+    assert "repeat that" in response.text and "/phone/answer" in response.text
+    assert db.query(PhoneMessage).filter(PhoneMessage.thread_id == thread.id).count() == 0
@@ -0,0 +1,130 @@
+import pytest
+
+from sqlalchemy import event
+
+from app.models import FormTemplate, FormField, FormResponse, FormFieldValue, Thread
+from app.routers.forms import form_response_dicts
+from app.schemas import FieldType
+from app.services.form_storage import (
+    to_document_value, document_value_to_str, store_field_values, migrate_to_documents,
+)
+from app.services.search_service import search
+from app.services.intake_service import get_form_responses
+
+@pytest.mark.parametrize("field_type, value, expected", [
+    (FieldType.INTEGER, "42", 42),
+    (FieldType.INTEGER, 42, 42),
+    (FieldType.INTEGER, "02139", "02139"),
+    (FieldType.INTEGER, "007", "007"),
+    (FieldType.INTEGER, " 7", " 7"),
+    (FieldType.INTEGER, "seven", "seven"),
+    (FieldType.CHECKBOX, True, True),
+    (FieldType.CHECKBOX, "False", False),
+    (FieldType.CHECKBOX, "true", "true"),
+    (FieldType.CHECKBOX, "yes", "yes"),
+    (FieldType.STRING, "42", "42"),
+    (FieldType.DATE, "2024-01-02", "2024-01-02"),
+])
+def test_document_values_round_trip_to_row_text(field_type, value, expected):
+    typed = to_document_value(field_type, value)
+
+    assert typed == expected and type(typed) is type(expected)
+    assert document_value_to_str(typed) == str(value)
+
+def make_template(db):
+    template = FormTemplate(name="Intake", is_current=True)
+    template.fields = [
+        FormField(name="Zip", field_type=FieldType.INTEGER, order=0),
+        FormField(name="Smoker", field_type=FieldType.CHECKBOX, order=1),
+        FormField(name="Complaint", field_type=FieldType.STRING, order=2),
+    ]
+    db.add(template)
+    db.commit()
+    return template
+
+def test_migration_is_lossless(db):
+    template = make_template(db)
+    zip_field, smoker_field, complaint_field = template.fields
+    response = FormResponse(template_id=template.id)
+    response.field_values = [
+        FormFieldValue(field_id=zip_field.id, value="02139"),
+        FormFieldValue(field_id=smoker_field.id, value="true"),
+        FormFieldValue(field_id=complaint_field.id, value="my knee hurts"),
+    ]
+    db.add(response)
+    db.commit()
+    before = form_response_dicts(db, response_id=response.id)[0]["field_values"]
+
+    assert migrate_to_documents(db) == 1
+
+    assert db.query(FormFieldValue).count() == 0
+    # Same values and the same ids clients already hold
+    assert form_response_dicts(db, response_id=response.id)[0]["field_values"] == before
+
+def test_sqlite_search_indexes_document_values_only(db):
+    template = make_template(db)
+    zip_field, _, complaint_field = template.fields
+    response = FormResponse(template_id=template.id)
+    store_field_values(
+        db, response, [(zip_field.id, 2139), (complaint_field.id, "my knee hurts")],
+        {field.id: field.field_type for field in template.fields}, storage="document",
+    )
+    db.add(response)
+    db.commit()
+
+    hits = search(db, "knee")
+    assert [(hit["source"], hit["source_id"]) for hit in hits] == [("form_response", response.id)]
+    assert hits[0]["snippet"] == "my <b>knee</b> hurts"
+    # Field-id keys are not indexed
+    assert search(db, str(complaint_field.id)) == []
+
+    db.delete(response)
+    db.commit()
+    assert search(db, "knee") == []
+
+def store(db, template, values, storage):
+    response = FormResponse(template_id=template.id)
+    db.add(response)
+    store_field_values(db, response, values, {field.id: field.field_type for field in template.fields}, storage=storage)
+    db.commit()
+    return response
+
+def value_ids(db, response):
+    return [value["id"] for value in form_response_dicts(db, response_id=response.id)[0]["field_values"]]
+
+def test_document_values_keep_unique_ids(db):
+    template = make_template(db)
+    zip_field, smoker_field, complaint_field = template.fields
+    rows = store(db, template, [(zip_field.id, "02139"), (complaint_field.id, "knee")], "rows")
+    document = store(db, template, [(zip_field.id, 2139), (smoker_field.id, True)], "document")
+    ids = value_ids(db, rows) + value_ids(db, document)
+    # Deleting the newest row must not free its id for the next one
+    db.delete(rows)
+    db.commit()
+    ids += value_ids(db, store(db, template, [(complaint_field.id, "ankle")], "rows"))
+
+    assert all(isinstance(id_, int) for id_ in ids)
+    assert len(set(ids)) == len(ids) == 5
+    assert value_ids(db, document) == ids[2:4]
+
+@pytest.mark.parametrize("storage", ["rows", "document"])
+def test_form_responses_for_thread_loads_fields_once(db, engine, storage):
+    template = make_template(db)
+    response = store(db, template, [(field.id, f"{field.name} answer") for field in template.fields], storage)
+    thread = Thread(completed=True, form=response)
+    db.add(thread)
+    db.commit()
+    db.expire_all()
+
+    field_queries = []
+    def count(conn, cursor, statement, *args):
+        if "FROM form_fields" in statement:
+            field_queries.append(statement)
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        result = get_form_responses(thread.id, db)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert result["responses"] == {field.name: f"{field.name} answer" for field in template.fields}
+    assert len(field_queries) == 1
@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import List
+
+import pytest
+from fastapi import FastAPI, Depends
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, joinedload
+
+from app import models, schemas
+from app.database import get_db
+from app.routers import forms
+
+def reference_app() -> FastAPI:
+    """The ORM + response_model implementation GET /forms/responses replaced, served by FastAPI as before."""
+    app = FastAPI()
+
+    @app.get("/forms/responses", response_model=List[schemas.FormResponse])
+    def get_form_responses(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+        responses = db.query(models.FormResponse).options(
+            joinedload(models.FormResponse.field_values).joinedload(models.FormFieldValue.field),
+            joinedload(models.FormResponse.thread)
+        ).order_by(models.FormResponse.id).offset(skip).limit(limit).all()
+
+        for response in responses:
+            response.thread_id = response.thread.id if response.thread else None
+
+        return responses
+
+    return app
+
+@pytest.fixture
+def clients(db):
+    app = FastAPI()
+    app.include_router(forms.router, prefix="/forms")
+    reference = reference_app()
+    for each in (app, reference):
+        each.dependency_overrides[get_db] = lambda: db
+    return TestClient(app), TestClient(reference)
+
+@pytest.fixture
+def responses(db):
+    templates = []
+    for name in ("Intake", "Follow-up"):
+        template = models.FormTemplate(name=name)
+        template.fields = [
+            models.FormField(name="Zip", field_type=schemas.FieldType.INTEGER, order=0),
+            models.FormField(name="Complaint", field_type=schemas.FieldType.STRING, order=1),
+        ]
+        templates.append(template)
+    db.add_all(templates)
+    db.flush()
+
+    for index in range(7):
+        template = templates[index % 2]
+        response = models.FormResponse(template_id=template.id)
+        response.field_values = [
+            models.FormFieldValue(field_id=field.id, value=f"{field.name} {index}")
+            for field in template.fields[:1 + index % 2]
+        ]
+        db.add(response)
+        if index % 3:
+            # Only some responses came from a call
+            db.add(models.Thread(completed=True, form=response))
+    db.add(models.FormResponse(template_id=templates[0].id))  # No answers
+    db.commit()
+
+def normalized(body):
+    for response in body:
+        response["submitted_at"] = datetime.fromisoformat(response["submitted_at"])
+        response["field_values"].sort(key=lambda field_value: field_value["id"])
+    return body
+
+@pytest.mark.parametrize("params", [{}, {"limit": 3}, {"skip": 2, "limit": 4}, {"skip": 6}, {"skip": 20}])
+def test_responses_match_pydantic_serialization(clients, responses, params):
+    client, reference = clients
+
+    actual, expected = client.get("/forms/responses", params=params), reference.get("/forms/responses", params=params)
+
+    assert actual.status_code == expected.status_code == 200
+    assert normalized(actual.json()) == normalized(expected.json())
+
+def test_responses_cover_thread_and_template(clients, responses):
+    client, _ = clients
+
+    body = client.get("/forms/responses").json()
+
+    assert len(body) == 8
+    assert {response["template_name"] for response in body} == {"Intake", "Follow-up"}
+    assert sum(response["thread_id"] is None for response in body) == 4
+    assert [response["id"] for response in body] == sorted(response["id"] for response in body)
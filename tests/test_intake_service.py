@@ -0,0 +1,144 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from langchain_openai import ChatOpenAI
+from langchain_core.messages import AIMessage
+from sqlalchemy.orm import sessionmaker
+
+from app.models import FormTemplate, FormField, FormResponse, Thread
+from app.schemas import FieldType
+from app.services import intake_service
+
+class FakeAgent:
+    """Stands in for the compiled agent: submits the form, then replies."""
+
+    def __init__(self, tools):
+        self.form_tool = tools[0]
+
+    async def astream(self, inputs, config):
+        await self.form_tool.ainvoke({"complaint": inputs["messages"][0].content})
+        yield {"agent": {"messages": [AIMessage(content="Thanks, your form is complete.")]}}
+
+@pytest.fixture
+def built_agents(monkeypatch):
+    built = []
+
+    def create_react_agent(model, tools, **kwargs):
+        built.append(FakeAgent(tools))
+        return built[-1]
+
+    monkeypatch.setattr(intake_service, "create_react_agent", create_react_agent)
+    monkeypatch.setattr(intake_service, "AGENT_WARMUP_CONNECTION", False)
+    monkeypatch.setattr(intake_service, "agent_cache", type(intake_service.agent_cache)())
+    return built
+
+@pytest.fixture
+def thread(db):
+    template = FormTemplate(name="Intake", is_current=True)
+    template.fields = [FormField(name="Complaint", field_type=FieldType.STRING, order=0)]
+    thread = Thread(completed=False)
+    db.add_all([template, thread])
+    db.commit()
+    return thread
+
+def test_agent_built_once_per_thread_and_warmed_up(engine, db, thread, built_agents):
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    asyncio.run(intake_service.warm_up_thread(session_factory, thread.id))
+    assert len(built_agents) == 1
+
+    reply = asyncio.run(intake_service.process_message("Sore knee", db, thread_id=thread.id))
+    asyncio.run(intake_service.process_message("Sore knee", db, thread_id=thread.id))
+
+    assert reply == "Thanks, your form is complete."
+    assert len(built_agents) == 1
+
+def test_cached_form_tool_uses_current_turn_session(engine, db, thread, built_agents):
+    # The agent is built with a session that is closed before the turn runs
+    intake_service.prepare_thread(sessionmaker(bind=engine), thread.id)
+
+    asyncio.run(intake_service.process_message("Sore knee", db, thread_id=thread.id))
+
+    db.refresh(thread)
+    assert thread.completed
+    assert db.query(FormResponse).one().field_values[0].value == "Sore knee"
+
+class ModelsHandler(BaseHTTPRequestHandler):
+    """Answers GET /v1/models over keep-alive HTTP/1.1, like the OpenAI API."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"object": "list", "data": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def openai_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ModelsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+# Greeting (~5s), the caller's reply and Twilio's speech recognition
+FIRST_TURN_DELAY_SECONDS = 30
+
+def test_warm_up_connection_outlives_the_greeting(engine, thread, built_agents, openai_server, monkeypatch):
+    http_client = intake_service.build_http_async_client()
+    model = ChatOpenAI(model="gpt-4o", api_key="test", base_url=openai_server, http_async_client=http_client)
+    monkeypatch.setattr(intake_service, "model", model)
+    monkeypatch.setattr(intake_service, "AGENT_WARMUP_CONNECTION", True)
+
+    asyncio.run(intake_service.warm_up_thread(sessionmaker(bind=engine), thread.id))
+
+    connections = http_client._transport._pool.connections
+    assert len(connections) == 1 and connections[0].is_idle()
+    assert connections[0]._connection._expire_at - time.monotonic() > FIRST_TURN_DELAY_SECONDS
+
+class SlowLookupCache(OrderedDict):
+    """Yields to other threads right after every lookup, widening any check-then-act window."""
+
+    def __contains__(self, key):
+        found = super().__contains__(key)
+        time.sleep(0.0001)
+        return found
+
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        time.sleep(0.0001)
+        return value
+
+def test_agent_cache_is_thread_safe(db, monkeypatch):
+    monkeypatch.setattr(intake_service, "agent_cache", SlowLookupCache())
+    monkeypatch.setattr(intake_service, "AGENT_CACHE_SIZE", 2)
+    monkeypatch.setattr(intake_service, "setup_form_tool", lambda db, thread_id: thread_id)
+    monkeypatch.setattr(intake_service, "create_react_agent", lambda model, tools, **kwargs: tools[0])
+    errors = []
+
+    def worker(offset):
+        try:
+            for index in range(200):
+                thread_id = (index + offset) % 5
+                assert intake_service.get_agent_and_tool(db, thread_id) == (thread_id, thread_id)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    for each in workers:
+        each.start()
+    for each in workers:
+        each.join()
+
+    assert errors == []
+    assert len(intake_service.agent_cache) <= 2
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from psycopg2.errors import LockNotAvailable
+from sqlalchemy.exc import OperationalError
+
+from app.models import Thread, PhoneMessage, PhoneMessageArchive, utc_now
+from app.services import retention_service
+from app.services.retention_service import compact_completed_threads, _month_start, _next_month, _partition_name
+
+def make_thread(db, completed=True, age_days=60, messages=(("", "Hello"), ("Hi", "How are you?")), transcript=None):
+    updated_at = utc_now() - timedelta(days=age_days)
+    thread = Thread(completed=completed, created_at=updated_at, updated_at=updated_at, transcript=transcript)
+    db.add(thread)
+    db.flush()
+    for offset, (voice_input, assistant_response) in enumerate(messages):
+        db.add(PhoneMessage(
+            thread_id=thread.id,
+            voice_input=voice_input,
+            assistant_response=assistant_response,
+            created_at=updated_at + timedelta(seconds=offset),
+        ))
+    db.commit()
+    return thread.id
+
+def message_count(db, thread_id):
+    return db.query(PhoneMessage).filter(PhoneMessage.thread_id == thread_id).count()
+
+def test_compacts_messages_into_transcript_in_time_order(db):
+    thread_id = make_thread(db, messages=[])
+    start = utc_now() - timedelta(days=60)
+    # Inserted out of order; created_at decides the transcript order
+    db.add(PhoneMessage(thread_id=thread_id, voice_input="My knee hurts", assistant_response="Since when?",
+                        created_at=start + timedelta(seconds=2)))
+    db.add(PhoneMessage(thread_id=thread_id, voice_input="", assistant_response="Hello, how are you?",
+                        created_at=start))
+    db.add(PhoneMessage(thread_id=thread_id, voice_input="Fine", assistant_response="What brings you in?",
+                        created_at=start + timedelta(seconds=1)))
+    db.commit()
+
+    assert compact_completed_threads(db, older_than=timedelta(days=30)) == 1
+
+    thread = db.get(Thread, thread_id)
+    assert thread.transcript == (
+        "Assistant: Hello, how are you?\n"
+        "Caller: Fine\n"
+        "Assistant: What brings you in?\n"
+        "Caller: My knee hurts\n"
+        "Assistant: Since when?"
+    )
+    assert message_count(db, thread_id) == 0
+
+def test_appends_to_existing_transcript(db):
+    thread_id = make_thread(db, messages=[("Bye", "Goodbye")], transcript="Caller: Earlier")
+
+    compact_completed_threads(db, older_than=timedelta(days=30))
+
+    assert db.get(Thread, thread_id).transcript == "Caller: Earlier\nCaller: Bye\nAssistant: Goodbye"
+
+def test_archive_mode_moves_rows_with_ids(db):
+    thread_id = make_thread(db)
+    message_ids = sorted(id_ for (id_,) in db.query(PhoneMessage.id).filter(PhoneMessage.thread_id == thread_id))
+
+    compact_completed_threads(db, older_than=timedelta(days=30), mode="archive")
+
+    archived = db.query(PhoneMessageArchive).order_by(PhoneMessageArchive.id).all()
+    assert [row.id for row in archived] == message_ids
+    assert [row.assistant_response for row in archived] == ["Hello", "How are you?"]
+    assert all(row.thread_id == thread_id for row in archived)
+    assert message_count(db, thread_id) == 0
+
+def test_delete_mode_does_not_archive(db):
+    thread_id = make_thread(db)
+
+    compact_completed_threads(db, older_than=timedelta(days=30), mode="delete")
+
+    assert db.query(PhoneMessageArchive).count() == 0
+    assert message_count(db, thread_id) == 0
+    assert db.get(Thread, thread_id).transcript
+
+def test_leaves_incomplete_and_recent_threads_alone(db):
+    incomplete_id = make_thread(db, completed=False)
+    recent_id = make_thread(db, age_days=1)
+    old_id = make_thread(db)
+
+    assert compact_completed_threads(db, older_than=timedelta(days=30)) == 1
+
+    assert message_count(db, incomplete_id) == 2
+    assert message_count(db, recent_id) == 2
+    assert db.get(Thread, incomplete_id).transcript is None
+    assert db.get(Thread, recent_id).transcript is None
+    assert message_count(db, old_id) == 0
+
+def test_batches_until_no_eligible_threads_left(db):
+    thread_ids = [make_thread(db) for _ in range(5)]
+
+    assert compact_completed_threads(db, older_than=timedelta(days=30), batch_size=2) == 5
+
+    assert all(message_count(db, thread_id) == 0 for thread_id in thread_ids)
+
+def test_batch_loop_stops_when_batches_divide_evenly(db):
+    for _ in range(4):
+        make_thread(db)
+
+    assert compact_completed_threads(db, older_than=timedelta(days=30), batch_size=2) == 4
+    # Already compacted threads have no messages left and are not picked up again
+    assert compact_completed_threads(db, older_than=timedelta(days=30), batch_size=2) == 0
+
+def test_rejects_unknown_mode(db):
+    make_thread(db)
+
+    with pytest.raises(ValueError):
+        compact_completed_threads(db, older_than=timedelta(days=30), mode="shred")
+
+    assert db.query(PhoneMessage).count() == 2
+
+def failing_batch(error):
+    def compact_thread_batch(*args, **kwargs):
+        raise OperationalError("SELECT ... FOR UPDATE", {}, error)
+    return compact_thread_batch
+
+def test_lock_timeout_ends_the_run_quietly(db, monkeypatch):
+    monkeypatch.setattr(retention_service, "compact_thread_batch", failing_batch(LockNotAvailable("canceling statement due to lock timeout")))
+
+    assert compact_completed_threads(db, older_than=timedelta(days=30)) == 0
+
+def test_other_operational_errors_propagate(db, monkeypatch):
+    monkeypatch.setattr(retention_service, "compact_thread_batch", failing_batch(Exception("server closed the connection")))
+
+    with pytest.raises(OperationalError):
+        compact_completed_threads(db, older_than=timedelta(days=30))
+
+@pytest.mark.parametrize("value, month", [
+    # 2024-02-29 21:00 UTC, as returned by a session in UTC+5
+    (datetime(2024, 3, 1, 2, tzinfo=timezone(timedelta(hours=5))), "phone_messages_y2024m02"),
+    # 2024-01-01 03:00 UTC, as returned by a session in UTC-5
+    (datetime(2023, 12, 31, 22, tzinfo=timezone(timedelta(hours=-5))), "phone_messages_y2024m01"),
+    (datetime(2024, 12, 31, 23, tzinfo=timezone.utc), "phone_messages_y2024m12"),
+])
+def test_partition_months_are_utc(value, month):
+    start = _month_start(value)
+
+    assert _partition_name(start) == month
+    assert start <= value < _next_month(value)
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import Thread, PhoneMessage, FormTemplate, FormField, FormResponse, FormFieldValue, utc_now
+from app.schemas import FieldType
+from app.services.retention_service import compact_completed_threads
+from app.services.search_service import search, to_fts5_query
+
+def hits(db, query, **filters):
+    return [(row["source"], row["source_id"]) for row in search(db, query, **filters)]
+
+@pytest.fixture
+def intake(db):
+    """One completed call on template "Intake" and a response on template "Other"."""
+    template = FormTemplate(name="Intake", is_current=True)
+    template.fields = [FormField(name="Complaint", field_type=FieldType.STRING, order=0)]
+    other = FormTemplate(name="Other")
+    other.fields = [FormField(name="Complaint", field_type=FieldType.STRING, order=0)]
+    db.add_all([template, other])
+    db.flush()
+
+    response = FormResponse(template_id=template.id)
+    response.field_values = [FormFieldValue(field_id=template.fields[0].id, value="Swollen knee")]
+    thread = Thread(completed=True, form=response)
+    thread.messages = [PhoneMessage(voice_input="My knee hurts", assistant_response="Which knee?")]
+    other_response = FormResponse(template_id=other.id)
+    other_response.field_values = [FormFieldValue(field_id=other.fields[0].id, value="Knee brace")]
+    db.add_all([thread, other_response])
+    db.commit()
+    return thread, response, other_response
+
+def test_hits_carry_thread_response_and_template(db, intake):
+    thread, response, other_response = intake
+    thread.transcript = "Caller: knee pain since Monday"
+    db.commit()
+
+    results = {row["source"]: row for row in search(db, "knee", template_id=response.template_id)}
+
+    assert set(results) == {"phone_message", "transcript", "field_value"}
+    for row in results.values():
+        assert (row["thread_id"], row["response_id"], row["template_id"]) == (thread.id, response.id, response.template_id)
+    assert results["phone_message"]["source_id"] == thread.messages[0].id
+    assert results["transcript"]["source_id"] == thread.id
+    assert results["field_value"]["source_id"] == response.field_values[0].id
+    assert "<b>knee</b>" in results["transcript"]["snippet"]
+
+def test_template_filter(db, intake):
+    thread, response, other_response = intake
+
+    assert hits(db, "knee", template_id=other_response.template_id) == [("field_value", other_response.field_values[0].id)]
+    assert ("field_value", other_response.field_values[0].id) not in hits(db, "knee", template_id=response.template_id)
+
+def test_since_and_until_filters(db, intake):
+    now = utc_now()
+
+    assert len(hits(db, "knee", since=now - timedelta(hours=1))) == 3
+    assert hits(db, "knee", since=now + timedelta(hours=1)) == []
+    assert hits(db, "knee", until=now - timedelta(hours=1)) == []
+    assert len(hits(db, "knee", until=now + timedelta(hours=1))) == 3
+
+def test_since_and_until_with_non_utc_offset(db, intake):
+    eastern = timezone(timedelta(hours=-5))
+    an_hour_from_now = (utc_now() + timedelta(hours=1)).astimezone(eastern)
+
+    assert hits(db, "knee", since=an_hour_from_now) == []
+    assert len(hits(db, "knee", until=an_hour_from_now)) == 3
+
+def test_updates_and_deletes_reach_the_index(db, intake):
+    thread, response, other_response = intake
+    message = thread.messages[0]
+
+    message.voice_input = "My ankle hurts"
+    message.assistant_response = "Which ankle?"
+    response.field_values[0].value = "Sprained ankle"
+    db.commit()
+    assert ("phone_message", message.id) in hits(db, "ankle")
+    assert ("phone_message", message.id) not in hits(db, "knee")
+    assert ("field_value", response.field_values[0].id) not in hits(db, "knee")
+
+    db.delete(message)
+    db.delete(other_response)
+    db.commit()
+    assert hits(db, "knee") == []
+    assert hits(db, "ankle") == [("field_value", response.field_values[0].id)]
+
+def test_compacted_transcript_stays_searchable(db, intake):
+    thread, response, other_response = intake
+    thread.updated_at = utc_now() - timedelta(days=60)
+    db.commit()
+
+    assert hits(db, "hurts") == [("phone_message", thread.messages[0].id)]
+
+    assert compact_completed_threads(db, older_than=timedelta(days=30)) == 1
+
+    # The message rows are gone and the transcript update reached threads_fts
+    assert hits(db, "hurts") == [("transcript", thread.id)]
+
+def test_results_ranked_and_limited(db):
+    thread = Thread(completed=False)
+    thread.messages = [
+        PhoneMessage(voice_input="knee", assistant_response=""),
+        PhoneMessage(voice_input="knee knee knee", assistant_response=""),
+        PhoneMessage(voice_input="my knee and a long story about the weather and the drive over", assistant_response=""),
+    ]
+    db.add(thread)
+    db.commit()
+    first, repeated, long = thread.messages
+
+    results = search(db, "knee")
+    assert [row["source_id"] for row in results] == [repeated.id, first.id, long.id]
+    assert [row["rank"] for row in results] == sorted((row["rank"] for row in results), reverse=True)
+    assert [row["source_id"] for row in search(db, "knee", limit=2)] == [repeated.id, first.id]
+
+@pytest.mark.parametrize("query, expected", [
+    ("knee pain", '"knee" "pain"'),
+    ('knee"', '"knee"""'),
+    ("knee OR pain", '"knee" "OR" "pain"'),
+    ("NEAR(knee pain)", '"NEAR(knee" "pain)"'),
+    ("kne* -pain ^knee value:knee", '"kne*" "-pain" "^knee" "value:knee"'),
+    ("  ", ""),
+])
+def test_fts5_query_quotes_every_term(query, expected):
+    assert to_fts5_query(query) == expected
+
+@pytest.mark.parametrize("query", ['knee"', "knee OR", "NEAR(knee", "kne*", "-knee", "value:knee", "(knee", "AND"])
+def test_fts5_syntax_in_user_input_does_not_raise(db, intake, query):
+    search(db, query)
+
+def test_blank_query_returns_nothing(db, intake):
+    assert search(db, "   ") == []